@@ -0,0 +1,203 @@
+"""
+Vectorized anomaly scoring across many metric series at once.
+
+The notebook scores one EC2 instance with per-row pandas assignments. Here
+every series is loaded as one row of a 2-D array, memory-mapped on disk for
+large fleets, robust z-scores are computed for all series in one pass and
+the notebook's per-series models are fit in parallel across processes.
+Scores and predictions are memory-mapped next to the fleet array too.
+Results come back as a compact table with one row per flagged point.
+
+to use:
+    python batch.py data/*.csv --mmap fleet.npy --model lof --out anomalies.csv
+"""
+
+import argparse
+import os
+import pathlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import IsolationForest
+from sklearn.neighbors import LocalOutlierFactor
+
+# bytes of the fleet array processed at once when scoring memory-mapped data
+BLOCK_BYTES = 64 * 2**20
+
+
+def block_rows(data: np.ndarray) -> int:
+    """
+    rows per block, sized from BLOCK_BYTES since each row is a whole series.
+    """
+    return max(1, BLOCK_BYTES // max(data.shape[1] * data.itemsize, 1))
+
+
+def series_names(paths: list[str]) -> list[str]:
+    """
+    unique series names, each path relative to the common parent without suffix.
+    """
+    resolved = [pathlib.Path(p).resolve() for p in paths]
+    parent = pathlib.Path(os.path.commonpath([p.parent for p in resolved]))
+    names = [p.relative_to(parent).with_suffix("").as_posix() for p in resolved]
+    duplicates = sorted({n for n in names if names.count(n) > 1})
+    if duplicates:
+        raise ValueError(f"series given more than once: {', '.join(duplicates)}")
+    return names
+
+
+def count_rows(path: str) -> int:
+    with open(path, "r") as f:
+        return max(sum(1 for _ in f) - 1, 0)
+
+
+def allocate(shape, dtype, mmap_path: str = None) -> np.ndarray:
+    """
+    array on disk if a path is given, otherwise in memory.
+    """
+    if mmap_path:
+        return np.lib.format.open_memmap(mmap_path, mode="w+", dtype=dtype, shape=shape)
+    return np.empty(shape, dtype=dtype)
+
+
+def load_series(paths: list[str], mmap_path: str = None) -> np.ndarray:
+    """
+    load NAB style csvs (timestamp,value) into a (series, time) float32 array.
+    shorter series are padded with nan at the end.
+    """
+    # first pass only counts rows so the fleet array can be sized up front
+    lengths = [count_rows(p) for p in paths]
+    data = allocate((len(paths), max(lengths, default=0)), np.float32, mmap_path)
+    # second pass writes each series straight in, one file in memory at a time
+    for i, p in enumerate(paths):
+        values = np.loadtxt(p, delimiter=",", skiprows=1, usecols=1, dtype=np.float32, ndmin=1)
+        data[i, :len(values)] = values
+        data[i, len(values):] = np.nan
+    if mmap_path:
+        data.flush()
+    return data
+
+
+def robust_z(data: np.ndarray, mmap_path: str = None) -> np.ndarray:
+    """
+    robust z score of every point against its own series median and MAD.
+
+    a flat or idle series has MAD 0, as in the notebook's formula every
+    point off its median then scores +-inf and points on it score 0.
+    """
+    z = allocate(data.shape, np.float32, mmap_path)
+    rows = block_rows(data)
+    # block over rows so memory-mapped fleets never load whole
+    for start in range(0, data.shape[0], rows):
+        block = np.asarray(data[start:start + rows])
+        median = np.nanmedian(block, axis=1, keepdims=True)
+        deviation = block - median
+        mad = np.nanmedian(np.abs(deviation), axis=1, keepdims=True)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # sign keeps the nan padding nan, 0 * inf is replaced by 0
+            flat = np.where(deviation == 0, 0.0, np.sign(deviation) * np.inf)
+            z[start:start + rows] = np.where(mad > 0, 0.6745 * deviation / mad, flat)
+    if mmap_path:
+        z.flush()
+    return z
+
+
+def fit_series(args) -> np.ndarray:
+    """
+    fit model on the first train_frac of one series and predict the rest.
+    returns -1 for outliers and 1 for normal points, 0 where not predicted.
+    """
+    path, row, model, train_frac = args
+    values = np.load(path, mmap_mode="r")[row]
+    values = values[~np.isnan(values)].reshape(-1, 1)
+    split = int(len(values) * train_frac)
+    pred = np.zeros(len(values), dtype=np.int8)
+    if split < 2 or split == len(values):
+        return pred
+
+    # contamination as in the notebook, one outlier per training series
+    contamination = max(1 / split, 1e-4)
+    if model == "forest":
+        clf = IsolationForest(contamination=contamination, random_state=54)
+    else:
+        clf = LocalOutlierFactor(contamination=contamination, novelty=True)
+    clf.fit(values[:split])
+    pred[split:] = clf.predict(values[split:])
+    return pred
+
+
+def fit_models(mmap_path: str, n_series: int, model: str = "lof", train_frac: float = 0.88,
+               workers: int = None, out_path: str = None) -> np.ndarray:
+    """
+    fit one model per series in parallel, workers read rows from the memmap.
+    """
+    length = np.load(mmap_path, mmap_mode="r").shape[1]
+    preds = allocate((n_series, length), np.int8, out_path)
+    preds[:] = 0
+    jobs = [(mmap_path, row, model, train_frac) for row in range(n_series)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for row, pred in enumerate(pool.map(fit_series, jobs, chunksize=16)):
+            preds[row, :len(pred)] = pred
+    return preds
+
+
+def anomaly_table(data: np.ndarray, z: np.ndarray, names: list[str], threshold: float = 3.5,
+                  model_preds: np.ndarray = None) -> pd.DataFrame:
+    """
+    compact table of flagged points, one row per (series, time index).
+    """
+    parts = []
+    rows_per_block = block_rows(data)
+    # flag block by block so only flagged points are held in memory
+    for start in range(0, data.shape[0], rows_per_block):
+        z_block = np.asarray(z[start:start + rows_per_block])
+        mad_flag = z_block > threshold
+        if model_preds is not None:
+            model_flag = np.asarray(model_preds[start:start + rows_per_block]) == -1
+        else:
+            model_flag = np.zeros_like(mad_flag)
+        rows, t = np.nonzero(mad_flag | model_flag)
+        parts.append((
+            rows + start,
+            t,
+            np.asarray(data[start:start + rows_per_block])[rows, t],
+            z_block[rows, t],
+            mad_flag[rows, t],
+            model_flag[rows, t],
+        ))
+    series, t, value, z_score, mad, model = (np.concatenate(cols) for cols in zip(*parts))
+    return pd.DataFrame({
+        "series": pd.Categorical.from_codes(series, categories=names),
+        "t": t.astype(np.int32),
+        "value": value,
+        "z_score": z_score,
+        "mad": mad,
+        "model": model,
+    })
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="batch anomaly scoring over many metric csvs")
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--mmap", default="fleet.npy", help="memory-mapped array file for the fleet")
+    parser.add_argument("--model", choices=["none", "lof", "forest"], default="none")
+    parser.add_argument("--threshold", type=float, default=3.5)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--out", default="anomalies.csv")
+    args = parser.parse_args()
+
+    # checked before any loading so a bad fleet layout fails fast
+    try:
+        names = series_names(args.paths)
+    except ValueError as e:
+        parser.error(str(e))
+    data = load_series(args.paths, args.mmap)
+    # scores and predictions live next to the fleet array on disk
+    stem = pathlib.Path(args.mmap).with_suffix("")
+    z = robust_z(data, f"{stem}.z.npy")
+    preds = None
+    if args.model != "none":
+        preds = fit_models(args.mmap, len(names), args.model, workers=args.workers, out_path=f"{stem}.pred.npy")
+    table = anomaly_table(data, z, names, args.threshold, preds)
+    table.to_csv(args.out, index=False)
+    print(f"series: {len(names)}, points: {data.size}, flagged: {len(table)} -> {args.out}")
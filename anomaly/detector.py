@@ -0,0 +1,235 @@
+"""
+Streaming version of the anomaly notebook's MAD and LOF detection.
+
+The notebook loads all of cpu.csv and computes the median absolute deviation
+over the whole series. Here the median and MAD are kept over a sliding
+window so each new point of a live metric stream is scored as it arrives.
+A LocalOutlierFactor model is fit on the window when warm-up ends, then
+refit in a background thread every refit_every points and swapped in once
+trained.
+
+to use:
+    from detector import StreamingDetector
+    det = StreamingDetector(window=500)
+    for value in stream:
+        result = det.update(value)
+
+benchmark by replaying a NAB csv:
+    python detector.py cpu.csv --window 500 --lof
+
+data: https://github.com/numenta/NAB/blob/master/data/realAWSCloudwatch/ec2_cpu_utilization_24ae8d.csv
+"""
+
+import argparse
+import bisect
+import csv
+import math
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple, Optional
+
+import numpy as np
+from sklearn.neighbors import LocalOutlierFactor
+
+# same labels as the notebook
+ANOMALIES = [
+    "2014-02-26 22:05:00",
+    "2014-02-27 17:15:00",
+]
+
+
+class Detection(NamedTuple):
+    value: float
+    median: float
+    mad: float
+    z_score: float
+    mad_anomaly: bool
+    lof_anomaly: Optional[bool]
+
+
+class RollingMAD:
+    """
+    Median and median absolute deviation over a sliding window.
+
+    Keeps the window in a sorted list, so the median is a lookup and the
+    MAD is the k-th smallest deviation from the median, found by binary
+    search over the two sorted deviation runs on either side of it.
+    Inserts use bisect, a memmove of the list rather than a heap rebalance.
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values = deque()
+        self.sorted = []
+
+    def __len__(self):
+        return len(self.sorted)
+
+    def add(self, x: float):
+        self.values.append(x)
+        bisect.insort(self.sorted, x)
+        if len(self.values) > self.window:
+            old = self.values.popleft()
+            del self.sorted[bisect.bisect_left(self.sorted, old)]
+
+    def median(self) -> float:
+        s, n = self.sorted, len(self.sorted)
+        mid = n // 2
+        return s[mid] if n % 2 else (s[mid - 1] + s[mid]) / 2
+
+    def kth_deviation(self, k: int, m: float) -> float:
+        """
+        k-th smallest |x - m| (0 based) over the window in O(log w).
+        """
+        s, n = self.sorted, len(self.sorted)
+        split = bisect.bisect_left(s, m)
+        # left run m - s[split-1], m - s[split-2], ... and right run
+        # s[split] - m, s[split+1] - m, ... are both increasing
+        left = lambda i: m - s[split - 1 - i]
+        right = lambda j: s[split + j] - m
+        n_left, n_right = split, n - split
+
+        # find how many of the k+1 smallest come from the left run
+        lo, hi = max(0, k + 1 - n_right), min(k + 1, n_left)
+        while lo < hi:
+            i = (lo + hi) // 2
+            j = k + 1 - i
+            if j > 0 and left(i) < right(j - 1):
+                lo = i + 1
+            else:
+                hi = i
+        i, j = lo, k + 1 - lo
+        return max(left(i - 1) if i > 0 else 0.0, right(j - 1) if j > 0 else 0.0)
+
+    def mad(self, m: float) -> float:
+        n = len(self.sorted)
+        if n % 2:
+            return self.kth_deviation(n // 2, m)
+        return (self.kth_deviation(n // 2 - 1, m) + self.kth_deviation(n // 2, m)) / 2
+
+
+class StreamingDetector:
+    """
+    Score each point with a rolling robust z-score and an optional LOF model.
+    """
+
+    def __init__(self, window: int = 500, threshold: float = 3.5, lof: bool = False,
+                 refit_every: int = 250, min_points: int = 30):
+        if window < 1 or min_points < 1 or refit_every < 1:
+            raise ValueError("window, min_points and refit_every must be at least 1")
+        # the window never holds more than window points, so warm up within it
+        min_points = min(min_points, window)
+        if lof and min_points < 2:
+            # LOF contamination of 1/len(train) must stay at or below 0.5
+            raise ValueError("lof needs window and min_points of at least 2")
+        self.stats = RollingMAD(window)
+        self.threshold = threshold
+        self.min_points = min_points
+        self.lof_enabled = lof
+        self.refit_every = refit_every
+        self.seen = 0
+        self.lof = None
+        self.refit = None
+        self.executor = ThreadPoolExecutor(max_workers=1) if lof else None
+
+    def update(self, x: float) -> Detection:
+        """
+        score x against the current window, then add it to the window.
+        """
+        x = float(x)
+        if len(self.stats) < self.min_points:
+            self.stats.add(x)
+            self.seen += 1
+            return Detection(x, x, 0.0, 0.0, False, None)
+
+        median = self.stats.median()
+        mad = self.stats.mad(median)
+        # robust z score as in the notebook, only upward spikes are outliers.
+        # a flat window has MAD 0, any point off the median is then +-inf
+        if mad > 0:
+            z = 0.6745 * (x - median) / mad
+        else:
+            z = 0.0 if x == median else math.copysign(math.inf, x - median)
+        lof_anomaly = self.score_lof(x) if self.lof_enabled else None
+
+        self.stats.add(x)
+        self.seen += 1
+        if self.lof_enabled and self.seen % self.refit_every == 0:
+            self.schedule_refit()
+        return Detection(x, median, mad, z, z > self.threshold, lof_anomaly)
+
+    def score_lof(self, x: float) -> bool:
+        # swap in a finished background refit
+        if self.refit is not None and self.refit.done():
+            self.lof = self.refit.result()
+            self.refit = None
+        if self.lof is None:
+            # first model is fit inline on the warm-up window, only min_points rows,
+            # so scores do not depend on how fast the stream arrives
+            self.lof = fit_lof(np.array(self.stats.values).reshape(-1, 1))
+        return bool(self.lof.predict([[x]])[0] == -1)
+
+    def schedule_refit(self):
+        if self.refit is not None:
+            return
+        train = np.array(self.stats.values).reshape(-1, 1)
+        self.refit = self.executor.submit(fit_lof, train)
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+
+
+def fit_lof(train: np.ndarray) -> LocalOutlierFactor:
+    """
+    fit novelty LOF on a window snapshot, contamination as in the notebook.
+    """
+    model = LocalOutlierFactor(contamination=1 / len(train), novelty=True)
+    model.fit(train)
+    return model
+
+
+def read_stream(path: str):
+    """
+    yield (timestamp, value) rows from a NAB csv without loading it whole.
+    """
+    with open(path, "r", newline="") as f:
+        for row in csv.DictReader(f):
+            yield row["timestamp"], float(row["value"])
+
+
+def replay(path: str, window: int = 500, lof: bool = False, refit_every: int = 250):
+    """
+    replay a NAB csv through the detector and report throughput.
+    """
+    det = StreamingDetector(window=window, lof=lof, refit_every=refit_every)
+    mad_hits, lof_hits = [], []
+    count = 0
+    start = time.perf_counter()
+    for timestamp, value in read_stream(path):
+        result = det.update(value)
+        if result.mad_anomaly:
+            mad_hits.append(timestamp)
+        if result.lof_anomaly:
+            lof_hits.append(timestamp)
+        count += 1
+    elapsed = time.perf_counter() - start
+    det.close()
+
+    print(f"points: {count}, window: {window}, lof: {lof}")
+    print(f"throughput: {count / elapsed:,.0f} points/sec ({elapsed:.3f}s)")
+    print(f"mad flagged {len(mad_hits)}, labeled found {sum(t in mad_hits for t in ANOMALIES)}/{len(ANOMALIES)}")
+    if lof:
+        print(f"lof flagged {len(lof_hits)}, labeled found {sum(t in lof_hits for t in ANOMALIES)}/{len(ANOMALIES)}")
+    return count / elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="replay a NAB csv through the streaming detector")
+    parser.add_argument("path", nargs="?", default="cpu.csv")
+    parser.add_argument("--window", type=int, default=500)
+    parser.add_argument("--lof", action="store_true", help="also score with background refit LOF")
+    parser.add_argument("--refit-every", type=int, default=250)
+    args = parser.parse_args()
+    replay(args.path, args.window, args.lof, args.refit_every)
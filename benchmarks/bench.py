@@ -0,0 +1,260 @@
+"""
+Benchmark and profiling suite for the repo's two search engines.
+
+Runs IntelligentAgent (2048_agent/agent.py) over fixed game seeds and the
+sudoku backtracking solver (sudoku/main.py) over a fixed puzzle corpus.
+Each case is timed as the best of --repeat runs after a warm-up run and
+reports nodes/sec, time per move or solve and peak memory, and can
+optionally dump cProfile stats and tracemalloc top allocations.
+
+to use:
+    python bench.py run --out baselines/main.json
+    python bench.py run --out new.json --profile profiles/
+    python bench.py compare baselines/main.json new.json --threshold 0.15
+
+compare exits with status 1 if any case slowed down past the threshold.
+"""
+
+import argparse
+import cProfile
+import importlib.util
+import json
+import pathlib
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from grid import add_random_tile, new_game
+
+REPO = pathlib.Path(__file__).resolve().parent.parent
+
+# fixed corpora, changing these invalidates saved baselines
+GAME_SEEDS = [1, 2, 3]
+GAME_MOVES = 40
+PUZZLES = {
+    "euler01": "003020600900305001001806400008102900700000008006708200002609500800203009005010300",
+    "euler02": "200080300060070084030500209000105408000000000402706000301007040720040060004010003",
+    "euler03": "000000907000420180000705026100904000050000040000507009920108000034059000507000000",
+    "euler06": "100920000524010000000000070050008102000000000402700090060000000000030945000071006",
+    "inkala": "800000000003600000070090200050007000000045700000100030001000068008500010090000400",
+}
+
+
+def load(name: str, path: pathlib.Path, **injected):
+    """
+    import a project file by path, injecting names its framework would provide.
+    """
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    module.__dict__.update(injected)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_agent():
+    # agent.py subclasses the course framework's BaseAI, not shipped here
+    agent = load("agent2048", REPO / "2048_agent" / "agent.py", BaseAI=object)
+
+    class CountingAgent(agent.IntelligentAgent):
+        """
+        IntelligentAgent counting every max and chance node it expands.
+        """
+        nodes = 0
+
+        def maximize(self, state, depth, alpha, beta):
+            self.nodes += 1
+            return super().maximize(state, depth, alpha, beta)
+
+        def chance(self, state, depth, alpha, beta):
+            self.nodes += 1
+            return super().chance(state, depth, alpha, beta)
+
+    return CountingAgent
+
+
+def load_sudoku():
+    sudoku = load("sudoku_main", REPO / "sudoku" / "main.py")
+    forward_check = sudoku.forward_check
+    # every assignment tried by backtrack goes through forward_check
+    counter = {"nodes": 0}
+
+    def counting_forward_check(unassigned, p, move):
+        counter["nodes"] += 1
+        return forward_check(unassigned, p, move)
+
+    sudoku.forward_check = counting_forward_check
+    return sudoku, counter
+
+
+def play_2048(agent_cls, seed: int) -> dict:
+    """
+    play GAME_MOVES moves of a seeded game, computer tiles seeded too.
+    """
+    # agent samples chance cells with the global random module
+    random.seed(seed)
+    rng = random.Random(seed)
+    grid = new_game(rng)
+    agent = agent_cls()
+    moves = 0
+    start = time.perf_counter()
+    for _ in range(GAME_MOVES):
+        move = agent.getMove(grid)
+        if move is None:
+            break
+        grid.move(move)
+        add_random_tile(grid, rng)
+        moves += 1
+    elapsed = time.perf_counter() - start
+    return {
+        "nodes": agent.nodes,
+        "seconds": elapsed,
+        "units": moves,
+        "result": grid.getMaxTile(),
+    }
+
+
+def solve_sudoku(sudoku, counter, puzzle: str) -> dict:
+    board = {r + c: int(puzzle[9 * i + j]) for i, r in enumerate(sudoku.ROW) for j, c in enumerate(sudoku.COL)}
+    counter["nodes"] = 0
+    start = time.perf_counter()
+    solved = sudoku.backtracking(board)
+    elapsed = time.perf_counter() - start
+    return {
+        "nodes": counter["nodes"],
+        "seconds": elapsed,
+        "units": 1,
+        "result": is_solved(sudoku, solved),
+    }
+
+
+def is_solved(sudoku, board: dict) -> bool:
+    digits = set(range(1, 10))
+    rows = [[board[r + c] for c in sudoku.COL] for r in sudoku.ROW]
+    cols = [[board[r + c] for r in sudoku.ROW] for c in sudoku.COL]
+    boxes = [
+        [board[r + c] for r in sudoku.ROW[br:br + 3] for c in sudoku.COL[bc:bc + 3]]
+        for br in (0, 3, 6) for bc in (0, 3, 6)
+    ]
+    return all(set(group) == digits for group in rows + cols + boxes)
+
+
+def cases():
+    """
+    yield (case name, zero argument runner) for the whole corpus.
+    """
+    agent_cls = load_agent()
+    for seed in GAME_SEEDS:
+        yield f"2048/seed{seed}", lambda seed=seed: play_2048(agent_cls, seed)
+    sudoku, counter = load_sudoku()
+    for name, puzzle in PUZZLES.items():
+        yield f"sudoku/{name}", lambda puzzle=puzzle: solve_sudoku(sudoku, counter, puzzle)
+
+
+def measure(name: str, runner, profile_dir: pathlib.Path = None, memory: bool = True, repeat: int = 3) -> dict:
+    """
+    time one case as the best of repeat runs after a warm-up run,
+    then rerun it under tracemalloc and cProfile if asked.
+    """
+    runner()
+    # best of a few runs to reduce noise, the corpus is seeded so runs match
+    stats = min((runner() for _ in range(max(repeat, 1))), key=lambda s: s["seconds"])
+    record = {
+        "nodes": stats["nodes"],
+        "seconds": stats["seconds"],
+        "per_unit": stats["seconds"] / max(stats["units"], 1),
+        "nodes_per_sec": stats["nodes"] / stats["seconds"] if stats["seconds"] else 0.0,
+        "result": stats["result"],
+        "repeat": repeat,
+    }
+
+    # memory and profiling runs are separate so they do not skew timing
+    if memory:
+        tracemalloc.start()
+        runner()
+        snapshot = tracemalloc.take_snapshot()
+        record["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        if profile_dir:
+            top = snapshot.statistics("lineno")[:15]
+            path = profile_dir / f"{name.replace('/', '_')}.mem.txt"
+            path.write_text("\n".join(str(s) for s in top) + "\n")
+
+    if profile_dir:
+        profiler = cProfile.Profile()
+        profiler.runcall(runner)
+        profiler.dump_stats(profile_dir / f"{name.replace('/', '_')}.prof")
+    return record
+
+
+def run(out: str, profile: str = None, memory: bool = True, only: str = None, repeat: int = 3):
+    profile_dir = pathlib.Path(profile) if profile else None
+    if profile_dir:
+        profile_dir.mkdir(parents=True, exist_ok=True)
+
+    results = {}
+    print(f"{'case':<18}{'nodes':>10}{'nodes/s':>12}{'s/unit':>10}{'peak KB':>10}  result")
+    for name, runner in cases():
+        if only and only not in name:
+            continue
+        record = measure(name, runner, profile_dir, memory, repeat)
+        results[name] = record
+        peak = f"{record['peak_bytes'] / 1024:>10.0f}" if "peak_bytes" in record else f"{'-':>10}"
+        print(
+            f"{name:<18}{record['nodes']:>10}{record['nodes_per_sec']:>12,.0f}"
+            f"{record['per_unit']:>10.4f}{peak}  {record['result']}"
+        )
+
+    baseline = {"python": platform.python_version(), "machine": platform.machine(), "repeat": repeat, "cases": results}
+    path = pathlib.Path(out)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(baseline, indent=2) + "\n")
+    print(f"saved {path}")
+
+
+def compare(base: str, new: str, threshold: float = 0.15) -> int:
+    """
+    flag cases whose time per unit grew or nodes/sec fell past threshold.
+    """
+    old = json.loads(pathlib.Path(base).read_text())["cases"]
+    cur = json.loads(pathlib.Path(new).read_text())["cases"]
+    flagged = 0
+    print(f"{'case':<18}{'s/unit old':>12}{'s/unit new':>12}{'change':>9}{'nodes/s chg':>13}")
+    for name in sorted(old.keys() & cur.keys()):
+        a, b = old[name], cur[name]
+        change = b["per_unit"] / a["per_unit"] - 1 if a["per_unit"] else 0.0
+        nps_change = b["nodes_per_sec"] / a["nodes_per_sec"] - 1 if a["nodes_per_sec"] else 0.0
+        slow = change > threshold or nps_change < -threshold
+        flagged += slow
+        print(
+            f"{name:<18}{a['per_unit']:>12.4f}{b['per_unit']:>12.4f}{change:>+9.1%}{nps_change:>+13.1%}"
+            + ("  SLOWER" if slow else "")
+        )
+    for name in sorted(old.keys() ^ cur.keys()):
+        print(f"{name:<18}  only in {'base' if name in old else 'new'}")
+    print(f"{flagged} case(s) slower than {threshold:.0%}")
+    return 1 if flagged else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="2048 and sudoku solver benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the corpus and save a json baseline")
+    run_parser.add_argument("--out", default="baselines/latest.json")
+    run_parser.add_argument("--profile", help="directory for cProfile and tracemalloc output per case")
+    run_parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc peak memory run")
+    run_parser.add_argument("--only", help="only run cases containing this substring")
+    run_parser.add_argument("--repeat", type=int, default=3, help="timed runs per case, the best is kept")
+
+    compare_parser = commands.add_parser("compare", help="compare two baselines")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--threshold", type=float, default=0.15)
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run(args.out, args.profile, not args.no_memory, args.only, args.repeat)
+    else:
+        sys.exit(compare(args.base, args.new, args.threshold))
@@ -0,0 +1,90 @@
+"""
+Minimal 2048 grid with the interface IntelligentAgent expects.
+
+The course framework that agent.py was written against (Grid, BaseAI) is
+not part of this repo, so the benchmark plays on this stand-in.
+"""
+
+import random
+
+# directions as in the framework: up, down, left, right
+UP, DOWN, LEFT, RIGHT = 0, 1, 2, 3
+
+
+class Grid:
+    def __init__(self, size: int = 4):
+        self.size = size
+        self.map = [[0] * size for _ in range(size)]
+
+    def clone(self) -> "Grid":
+        grid = Grid(self.size)
+        grid.map = [row[:] for row in self.map]
+        return grid
+
+    def insertTile(self, pos, value: int):
+        self.map[pos[0]][pos[1]] = value
+
+    def getAvailableCells(self):
+        return [(x, y) for x in range(self.size) for y in range(self.size) if self.map[x][y] == 0]
+
+    def getMaxTile(self) -> int:
+        return max(max(row) for row in self.map)
+
+    def canMove(self) -> bool:
+        return bool(self.getAvailableMoves())
+
+    def move(self, direction: int) -> bool:
+        """
+        slide and merge tiles in direction, returns whether anything moved.
+        """
+        moved = False
+        for i in range(self.size):
+            # read each line in the direction tiles travel
+            if direction in (UP, DOWN):
+                cells = [(r, i) for r in range(self.size)]
+            else:
+                cells = [(i, c) for c in range(self.size)]
+            if direction in (DOWN, RIGHT):
+                cells.reverse()
+            line = [self.map[r][c] for r, c in cells]
+            merged = merge(line)
+            if merged != line:
+                moved = True
+                for (r, c), value in zip(cells, merged):
+                    self.map[r][c] = value
+        return moved
+
+    def getAvailableMoves(self, dirs=(UP, DOWN, LEFT, RIGHT)):
+        moves = []
+        for direction in dirs:
+            grid = self.clone()
+            if grid.move(direction):
+                moves.append((direction, grid))
+        return moves
+
+
+def merge(line: list[int]) -> list[int]:
+    tiles = [v for v in line if v]
+    out = []
+    i = 0
+    while i < len(tiles):
+        if i + 1 < len(tiles) and tiles[i] == tiles[i + 1]:
+            out.append(tiles[i] * 2)
+            i += 2
+        else:
+            out.append(tiles[i])
+            i += 1
+    return out + [0] * (len(line) - len(out))
+
+
+def new_game(rng: random.Random, size: int = 4) -> Grid:
+    grid = Grid(size)
+    for _ in range(2):
+        add_random_tile(grid, rng)
+    return grid
+
+
+def add_random_tile(grid: Grid, rng: random.Random):
+    cells = grid.getAvailableCells()
+    if cells:
+        grid.insertTile(rng.choice(cells), 2 if rng.random() < 0.9 else 4)
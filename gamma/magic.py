@@ -0,0 +1,18 @@
+"""
+Column names and class labels of the MAGIC gamma telescope data.
+
+Kept free of model dependencies so pipeline.py and streaming.py can share
+them without importing each other.
+"""
+
+import numpy as np
+
+# use listed features as column names for data
+COLUMNS = ["fLength", "fWidth", "fSize", "fConc", "fConc1", "fAsym", "fM3Long", "fM3Trans", "fAlpha", "fDist", "class"]
+
+
+def labels(classes) -> np.ndarray:
+    """
+    if g then 1, if h then 0
+    """
+    return (np.asarray(classes) == "g").astype(np.int64)
@@ -0,0 +1,178 @@
+"""
+Pluggable nearest neighbor indexes for the gamma/hadron classifier.
+
+The notebook's KNeighborsClassifier(n_neighbors=1) scans every training row
+for every prediction. These indexes share a fit(X) / query(Q, k) interface
+so the classifier can swap exact search for a tree or an approximate
+inverted file index, all working on batches of float32 features. Every
+query returns k columns, padded with inf distances and -1 ids when the
+index holds fewer than k rows.
+
+    ExactIndex  - brute force with batched matrix distances
+    TreeIndex   - sklearn KDTree or BallTree
+    IVFIndex    - pure numpy k-means inverted file, searches n_probe lists
+"""
+
+import numpy as np
+from sklearn.neighbors import BallTree, KDTree
+
+
+def sq_distances(Q: np.ndarray, X: np.ndarray, x_norms: np.ndarray = None) -> np.ndarray:
+    """
+    squared euclidean distances between rows of Q and X.
+    """
+    if x_norms is None:
+        x_norms = np.einsum("ij,ij->i", X, X)
+    q_norms = np.einsum("ij,ij->i", Q, Q)
+    d = q_norms[:, None] - 2 * Q @ X.T + x_norms[None, :]
+    # rounding can push tiny distances below zero
+    return np.maximum(d, 0, out=d)
+
+
+def top_k(d: np.ndarray, k: int):
+    """
+    indices and distances of the k smallest entries per row, sorted.
+    """
+    k = min(k, d.shape[1])
+    idx = np.argpartition(d, k - 1, axis=1)[:, :k]
+    part = np.take_along_axis(d, idx, axis=1)
+    order = np.argsort(part, axis=1)
+    return np.take_along_axis(part, order, axis=1), np.take_along_axis(idx, order, axis=1)
+
+
+def pad_k(dist: np.ndarray, idx: np.ndarray, k: int):
+    """
+    pad results to k columns with inf distances and -1 ids.
+    """
+    missing = k - idx.shape[1]
+    if missing <= 0:
+        return dist, idx
+    dist = np.pad(dist, ((0, 0), (0, missing)), constant_values=np.inf)
+    idx = np.pad(idx, ((0, 0), (0, missing)), constant_values=-1)
+    return dist, idx
+
+
+class ExactIndex:
+    """
+    Brute force search, the baseline the approximate indexes are scored on.
+    """
+
+    def __init__(self, batch_size: int = 1024):
+        self.batch_size = batch_size
+
+    def fit(self, X: np.ndarray):
+        self.X = np.ascontiguousarray(X, dtype=np.float32)
+        self.norms = np.einsum("ij,ij->i", self.X, self.X)
+        return self
+
+    def query(self, Q: np.ndarray, k: int = 1):
+        Q = np.ascontiguousarray(Q, dtype=np.float32)
+        dists, idxs = [], []
+        # batch queries so the distance matrix stays small
+        for start in range(0, len(Q), self.batch_size):
+            d = sq_distances(Q[start:start + self.batch_size], self.X, self.norms)
+            dist, idx = top_k(d, k)
+            dists.append(dist)
+            idxs.append(idx)
+        return pad_k(np.vstack(dists), np.vstack(idxs), k)
+
+
+class TreeIndex:
+    """
+    KDTree or BallTree search, exact but sublinear in low dimensions.
+    """
+
+    def __init__(self, kind: str = "kd", leaf_size: int = 40):
+        self.tree_cls = KDTree if kind == "kd" else BallTree
+        self.leaf_size = leaf_size
+
+    def fit(self, X: np.ndarray):
+        X = np.asarray(X, dtype=np.float32)
+        self.n = len(X)
+        self.tree = self.tree_cls(X, leaf_size=self.leaf_size)
+        return self
+
+    def query(self, Q: np.ndarray, k: int = 1):
+        # sklearn refuses k above the number of rows
+        dist, idx = self.tree.query(np.asarray(Q, dtype=np.float32), k=min(k, self.n))
+        return pad_k(dist ** 2, idx, k)
+
+
+class IVFIndex:
+    """
+    Inverted file index, approximate search over the n_probe closest lists.
+    More lists are probed for a query when those hold fewer than k rows.
+
+    Training rows are clustered with a few rounds of k-means. A query is
+    only compared against rows in its n_probe nearest clusters. Work is
+    grouped per list so each list is scored against all queries probing
+    it in one matrix product.
+    """
+
+    def __init__(self, n_lists: int = None, n_probe: int = 8, iters: int = 10, seed: int = 0):
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.iters = iters
+        self.seed = seed
+
+    def fit(self, X: np.ndarray):
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_lists = min(self.n_lists or max(1, int(np.sqrt(len(X)))), len(X))
+        rng = np.random.default_rng(self.seed)
+        centroids = X[rng.choice(len(X), n_lists, replace=False)].copy()
+        for _ in range(self.iters):
+            assign = sq_distances(X, centroids).argmin(axis=1)
+            counts = np.bincount(assign, minlength=n_lists).astype(np.float32)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, X)
+            # keep the old centroid for empty clusters
+            filled = counts > 0
+            centroids[filled] = sums[filled] / counts[filled, None]
+        assign = sq_distances(X, centroids).argmin(axis=1)
+
+        # store rows grouped by list so each list is a contiguous slice
+        order = np.argsort(assign, kind="stable")
+        self.X = X[order]
+        self.ids = order
+        self.norms = np.einsum("ij,ij->i", self.X, self.X)
+        self.offsets = np.concatenate(([0], np.cumsum(np.bincount(assign, minlength=n_lists))))
+        self.centroids = centroids
+        return self
+
+    def query(self, Q: np.ndarray, k: int = 1):
+        Q = np.ascontiguousarray(Q, dtype=np.float32)
+        order = np.argsort(sq_distances(Q, self.centroids), axis=1)
+        # probe at least n_probe lists, more while they hold fewer than k rows
+        covered = np.cumsum(np.diff(self.offsets)[order], axis=1)
+        n_probe = np.maximum((covered < k).sum(axis=1) + 1, self.n_probe)
+        probes = np.zeros(order.shape, dtype=bool)
+        np.put_along_axis(probes, order, np.arange(order.shape[1]) < n_probe[:, None], axis=1)
+
+        best_d = np.full((len(Q), k), np.inf, dtype=np.float32)
+        best_i = np.full((len(Q), k), -1, dtype=np.int64)
+        for lst in np.nonzero(probes.any(axis=0))[0]:
+            start, end = self.offsets[lst], self.offsets[lst + 1]
+            if start == end:
+                continue
+            rows = np.nonzero(probes[:, lst])[0]
+            d = sq_distances(Q[rows], self.X[start:end], self.norms[start:end])
+            # merge this list's candidates into the running top k
+            cand_d = np.hstack((best_d[rows], d))
+            cand_i = np.hstack((best_i[rows], np.broadcast_to(self.ids[start:end], d.shape)))
+            dist, pos = top_k(cand_d, k)
+            best_d[rows] = dist
+            best_i[rows] = np.take_along_axis(cand_i, pos, axis=1)
+        return best_d, best_i
+
+
+def make_index(name: str, **kwargs):
+    """
+    build index by name: exact, kd, ball or ivf.
+    """
+    if name == "exact":
+        return ExactIndex(**kwargs)
+    if name in ("kd", "ball"):
+        return TreeIndex(kind=name, **kwargs)
+    if name == "ivf":
+        return IVFIndex(**kwargs)
+    raise ValueError(f"unknown index: {name}")
@@ -0,0 +1,146 @@
+"""
+Gamma/hadron classification pipeline from the notebook as a reusable module.
+
+Loads the MAGIC telescope data, splits it into train/valid/test, scales it
+with scale_dataset and classifies with k nearest neighbors over a pluggable
+neighbor index (see neighbors.py) on float32 feature batches.
+
+benchmark exact vs tree vs approximate search:
+    python pipeline.py magic04.data
+
+data: https://archive.ics.uci.edu/dataset/159/magic+gamma+telescope
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from imblearn.over_sampling import RandomOverSampler
+from sklearn.metrics import accuracy_score
+from sklearn.preprocessing import StandardScaler
+
+from magic import COLUMNS, labels
+from neighbors import make_index
+
+
+def load_data(path: str = "magic04.data") -> pd.DataFrame:
+    df = pd.read_csv(path, names=COLUMNS)
+    df["class"] = labels(df["class"])
+    return df
+
+
+def split_dataset(df: pd.DataFrame, seed: int = None):
+    """
+    shuffle and split into 60% training, 20% validation and 20% test.
+    """
+    df = df.sample(frac=1, random_state=seed)
+    a, b = int(0.6 * len(df)), int(0.8 * len(df))
+    return df.iloc[:a], df.iloc[a:b], df.iloc[b:]
+
+
+def scale_dataset(dataframe: pd.DataFrame, oversample: bool = False, scaler: StandardScaler = None,
+                  random_state: int = None):
+    """
+    scale features to float32, optionally oversampling the minority class.
+    random_state seeds the oversampler so runs can be reproduced.
+
+    pass the scaler fitted on training data to reuse it for valid/test,
+    an unfitted or missing scaler is fit on this frame as in the notebook.
+    """
+    X = dataframe[dataframe.columns[:-1]].values
+    y = dataframe[dataframe.columns[-1]].values
+
+    if scaler is None:
+        scaler = StandardScaler()
+    if hasattr(scaler, "mean_"):
+        X = scaler.transform(X)
+    else:
+        X = scaler.fit_transform(X)
+    X = X.astype(np.float32)
+
+    # if one class oversampled then fix
+    if oversample:
+        ros = RandomOverSampler(random_state=random_state)
+        X, y = ros.fit_resample(X, y)
+
+    data = np.hstack((X, np.reshape(y, (-1, 1))))
+    return data, X, y
+
+
+class KNNClassifier:
+    """
+    Majority vote of k neighbors found by any neighbors.py index.
+    """
+
+    def __init__(self, index: str = "exact", k: int = 1, **index_kwargs):
+        self.index = make_index(index, **index_kwargs)
+        self.k = k
+
+    def fit(self, X: np.ndarray, y: np.ndarray):
+        self.classes, self.y = np.unique(y, return_inverse=True)
+        self.index.fit(np.asarray(X, dtype=np.float32))
+        return self
+
+    def predict(self, X: np.ndarray, batch_size: int = 4096) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float32)
+        preds = []
+        for start in range(0, len(X), batch_size):
+            _, idx = self.index.query(X[start:start + batch_size], self.k)
+            votes = np.zeros((len(idx), len(self.classes)), dtype=np.int32)
+            rows = np.repeat(np.arange(len(idx)), idx.shape[1])
+            # indexes pad missing neighbors with -1 when fit on fewer than k rows
+            found = idx.ravel() >= 0
+            np.add.at(votes, (rows[found], self.y[idx.ravel()[found]]), 1)
+            preds.append(self.classes[votes.argmax(axis=1)])
+        return np.concatenate(preds)
+
+
+def benchmark(path: str, k: int = 1, seed: int = 0, repeat: int = 3):
+    """
+    accuracy and queries/sec of each index against exact 1-NN.
+    """
+    train, valid, test = split_dataset(load_data(path), seed)
+    scaler = StandardScaler()
+    _, X_train, y_train = scale_dataset(train, oversample=True, scaler=scaler, random_state=seed)
+    _, X_test, y_test = scale_dataset(test, scaler=scaler)
+
+    configs = [
+        ("exact", {}),
+        ("kd", {}),
+        ("ball", {}),
+        ("ivf", {"n_probe": 4}),
+        ("ivf", {"n_probe": 8}),
+        ("ivf", {"n_probe": 16}),
+    ]
+    baseline = None
+    print(f"train: {len(X_train)}, test: {len(X_test)}, k: {k}")
+    print(f"{'index':<16}{'fit s':>8}{'queries/s':>12}{'accuracy':>10}{'agree':>8}")
+    for name, kwargs in configs:
+        model = KNNClassifier(name, k=k, **kwargs)
+        start = time.perf_counter()
+        model.fit(X_train, y_train)
+        fit_time = time.perf_counter() - start
+
+        # best of a few runs to reduce noise
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            y_pred = model.predict(X_test)
+            best = min(best, time.perf_counter() - start)
+        if baseline is None:
+            baseline = y_pred
+        label = name + "".join(f" {key}={value}" for key, value in kwargs.items())
+        print(
+            f"{label:<16}{fit_time:>8.3f}{len(X_test) / best:>12,.0f}"
+            f"{accuracy_score(y_test, y_pred):>10.4f}{np.mean(y_pred == baseline):>8.4f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="benchmark neighbor indexes on the MAGIC data")
+    parser.add_argument("path", nargs="?", default="magic04.data")
+    parser.add_argument("-k", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    benchmark(args.path, args.k, args.seed)
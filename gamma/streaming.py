@@ -0,0 +1,124 @@
+"""
+Out-of-core training and inference for the gamma/hadron naive bayes model.
+
+scale_dataset in the notebook holds the whole frame in memory, oversamples
+it and copies it again with np.hstack. Here the data is read in chunks:
+the scaler is fit with running statistics (partial_fit), GaussianNB is
+trained incrementally and classes are balanced with sample weights instead
+of duplicated rows. Predictions are written chunk by chunk, so memory is
+bounded by the chunk size rather than the log size.
+
+to use:
+    python streaming.py magic04.data --chunksize 5000 --out predictions.csv
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+from sklearn.naive_bayes import GaussianNB
+from sklearn.preprocessing import StandardScaler
+
+from magic import COLUMNS, labels
+
+CLASSES = np.array([0, 1])
+
+
+def read_chunks(path: str, chunksize: int = 5000):
+    """
+    yield (chunk index, features, labels) with the same class mapping as the notebook.
+    """
+    for i, df in enumerate(pd.read_csv(path, names=COLUMNS, chunksize=chunksize)):
+        X = df[COLUMNS[:-1]].to_numpy(dtype=np.float32)
+        y = labels(df["class"])
+        yield i, X, y
+
+
+def split_mask(chunk: int, n: int, part: str, seed: int = 0) -> np.ndarray:
+    """
+    rows of a chunk in the train (60%), valid (20%) or test (20%) split.
+    seeded per chunk so every pass over the file sees the same split.
+    """
+    u = np.random.default_rng([seed, chunk]).random(n)
+    if part == "train":
+        return u < 0.6
+    if part == "valid":
+        return (u >= 0.6) & (u < 0.8)
+    return u >= 0.8
+
+
+def fit_scaler(path: str, chunksize: int = 5000, seed: int = 0):
+    """
+    first pass, running mean/variance and class counts of the training rows.
+    """
+    scaler = StandardScaler()
+    counts = np.zeros(len(CLASSES), dtype=np.int64)
+    for i, X, y in read_chunks(path, chunksize):
+        train = split_mask(i, len(y), "train", seed)
+        if train.any():
+            scaler.partial_fit(X[train])
+            counts += np.bincount(y[train], minlength=len(CLASSES))
+    return scaler, counts
+
+
+def fit_model(path: str, scaler: StandardScaler, counts: np.ndarray, chunksize: int = 5000,
+              seed: int = 0) -> GaussianNB:
+    """
+    second pass, incremental GaussianNB with class-balanced sample weights.
+
+    weighting each row by n / (classes * class count) gives the classes equal
+    total weight, like the notebook's RandomOverSampler but without copies.
+    """
+    weights = counts.sum() / (len(CLASSES) * np.maximum(counts, 1))
+    model = GaussianNB()
+    for i, X, y in read_chunks(path, chunksize):
+        train = split_mask(i, len(y), "train", seed)
+        if train.any():
+            model.partial_fit(scaler.transform(X[train]), y[train], classes=CLASSES, sample_weight=weights[y[train]])
+    return model
+
+
+def predict_to_csv(path: str, out: str, scaler: StandardScaler, model: GaussianNB, part: str = "test",
+                   chunksize: int = 5000, seed: int = 0) -> np.ndarray:
+    """
+    write predictions for one split chunk by chunk, returns confusion counts.
+    """
+    confusion = np.zeros((len(CLASSES), len(CLASSES)), dtype=np.int64)
+    header = True
+    for i, X, y in read_chunks(path, chunksize):
+        rows = split_mask(i, len(y), part, seed)
+        if not rows.any():
+            continue
+        y_pred = model.predict(scaler.transform(X[rows]))
+        np.add.at(confusion, (y[rows], y_pred), 1)
+        pd.DataFrame({
+            "row": np.nonzero(rows)[0] + i * chunksize,
+            "class": y[rows],
+            "prediction": y_pred,
+        }).to_csv(out, mode="w" if header else "a", header=header, index=False)
+        header = False
+    return confusion
+
+
+def report(confusion: np.ndarray):
+    total = confusion.sum()
+    print(f"accuracy: {np.trace(confusion) / total:.4f} over {total} rows")
+    for c in CLASSES:
+        tp = confusion[c, c]
+        precision = tp / max(confusion[:, c].sum(), 1)
+        recall = tp / max(confusion[c].sum(), 1)
+        print(f"class {c}: precision {precision:.4f}, recall {recall:.4f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="chunked naive bayes training and inference")
+    parser.add_argument("path", nargs="?", default="magic04.data")
+    parser.add_argument("--chunksize", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="predictions.csv")
+    args = parser.parse_args()
+
+    scaler, counts = fit_scaler(args.path, args.chunksize, args.seed)
+    model = fit_model(args.path, scaler, counts, args.chunksize, args.seed)
+    confusion = predict_to_csv(args.path, args.out, scaler, model, chunksize=args.chunksize, seed=args.seed)
+    report(confusion)
@@ -0,0 +1,325 @@
+"""
+Content-addressed on-disk cache for LLM calls and offline replay.
+
+Every chat request is hashed by model, messages and bound tool schema.
+The response is stored as one json file under the cache directory so
+re-running the same prompt skips the network. Files are evicted least
+recently used first once the cache grows past its size bound.
+
+Each live run also records the order of its requests in a session log,
+which ReplayChatModel uses to run the whole graph without network access.
+"""
+
+import hashlib
+import json
+import os
+import pathlib
+import threading
+from typing import Any, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import (
+    AIMessageChunk,
+    BaseMessage,
+    message_chunk_to_message,
+    message_to_dict,
+    messages_from_dict,
+)
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from tenacity import Retrying, retry_if_exception_type, stop_after_attempt, wait_exponential_jitter
+
+
+def request_key(model_name: str, messages: list[BaseMessage], **kwargs) -> str:
+    """
+    hash model name, prompt messages and tool schema into a cache key.
+    """
+    # ids are assigned per run so only content is part of the key
+    prompt = [
+        {
+            "type": m.type,
+            "content": m.content,
+            "tool_calls": getattr(m, "tool_calls", None),
+            "tool_call_id": getattr(m, "tool_call_id", None),
+        }
+        for m in messages
+    ]
+    material = {"model": model_name, "messages": prompt, "kwargs": kwargs}
+    raw = json.dumps(material, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    Directory of json responses keyed by request hash with LRU eviction.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024, session: str = "latest"):
+        self.directory = pathlib.Path(directory)
+        self.entries = self.directory / "entries"
+        self.entries.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.session_path = self.directory / "sessions" / f"{session}.jsonl"
+        self.session_path.parent.mkdir(parents=True, exist_ok=True)
+        # start every live run with an empty session log
+        self.session_path.write_text("", encoding="utf-8")
+        self.total_bytes = sum(f.stat().st_size for f in self.entries.glob("*.json"))
+        # streaming mode calls the model from several threads
+        self.lock = threading.Lock()
+
+    def _path(self, key: str) -> pathlib.Path:
+        return self.entries / f"{key}.json"
+
+    def get(self, key: str) -> Optional[dict]:
+        path = self._path(key)
+        # lock so evict on another thread cannot unlink the file mid read
+        with self.lock:
+            try:
+                # touch file so eviction sees it as recently used
+                os.utime(path)
+                with open(path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except FileNotFoundError:
+                return None
+
+    def put(self, key: str, entry: dict):
+        with self.lock:
+            self._put(key, entry)
+
+    def _put(self, key: str, entry: dict):
+        path = self._path(key)
+        data = json.dumps(entry)
+        if path.exists():
+            self.total_bytes -= path.stat().st_size
+        # write to temp file first so a crash never leaves a partial entry
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(data, encoding="utf-8")
+        tmp.replace(path)
+        self.total_bytes += path.stat().st_size
+        self.evict()
+
+    def evict(self):
+        """
+        remove least recently used entries until under the size bound.
+        """
+        if self.total_bytes <= self.max_bytes:
+            return
+        files = sorted(self.entries.glob("*.json"), key=lambda f: f.stat().st_mtime)
+        for f in files:
+            if self.total_bytes <= self.max_bytes:
+                break
+            self.total_bytes -= f.stat().st_size
+            f.unlink()
+
+    def record(self, key: str, entry: dict):
+        """
+        append request to session log in call order for replay.
+        """
+        with self.lock, open(self.session_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"key": key, "entry": entry}) + "\n")
+
+
+def dump_result(result: ChatResult) -> dict:
+    return {
+        "generations": [
+            {"message": message_to_dict(g.message), "generation_info": g.generation_info}
+            for g in result.generations
+        ],
+        "llm_output": result.llm_output,
+    }
+
+
+def load_result(entry: dict) -> ChatResult:
+    messages = messages_from_dict([g["message"] for g in entry["generations"]])
+    generations = [
+        ChatGeneration(message=m, generation_info=g["generation_info"])
+        for m, g in zip(messages, entry["generations"])
+    ]
+    return ChatResult(generations=generations, llm_output=entry["llm_output"])
+
+
+def dump_chunks(chunk: ChatGenerationChunk) -> dict:
+    """
+    store accumulated stream as a regular cache entry.
+    """
+    message = message_chunk_to_message(chunk.message)
+    return {
+        "generations": [{"message": message_to_dict(message), "generation_info": chunk.generation_info}],
+        "llm_output": None,
+    }
+
+
+def load_hit(entry: dict) -> ChatResult:
+    """
+    load cached entry, flagged so telemetry does not count its tokens as spent.
+    """
+    result = load_result(entry)
+    for g in result.generations:
+        g.generation_info = {**(g.generation_info or {}), "cache_hit": True}
+    return result
+
+
+def load_chunks(entry: dict):
+    """
+    replay cached entry as a single stream chunk.
+    """
+    for g in load_hit(entry).generations:
+        m = g.message
+        tool_call_chunks = [
+            {"name": tc["name"], "args": json.dumps(tc["args"]), "id": tc["id"], "index": i}
+            for i, tc in enumerate(getattr(m, "tool_calls", []))
+        ]
+        yield ChatGenerationChunk(
+            message=AIMessageChunk(
+                content=m.content,
+                tool_call_chunks=tool_call_chunks,
+                usage_metadata=getattr(m, "usage_metadata", None),
+                response_metadata=m.response_metadata,
+            ),
+            generation_info=g.generation_info,
+        )
+
+
+class CachedChatModel(BaseChatModel):
+    """
+    Chat model wrapper serving repeated requests from an LLMCache.
+    """
+
+    model: BaseChatModel
+    store: Any
+    model_name: str = ""
+    hits: int = 0
+    misses: int = 0
+    # retried here rather than in the client so callbacks see each retry
+    max_retries: int = 2
+    retry_on: tuple = (Exception,)
+
+    def model_post_init(self, __context: Any):
+        if not self.model_name:
+            self.model_name = getattr(self.model, "model_name", None) or self.model._llm_type
+
+    @property
+    def _llm_type(self) -> str:
+        return "cached-chat-model"
+
+    @property
+    def _identifying_params(self) -> dict:
+        return {"model_name": self.model_name}
+
+    def bind_tools(self, tools, *, tool_choice=None, **kwargs):
+        """
+        format tools as openai schemas so they become part of the cache key.
+        """
+        formatted = [convert_to_openai_tool(t) for t in tools]
+        # match ChatOpenAI tool_choice conventions
+        if tool_choice == "any":
+            tool_choice = "required"
+        elif isinstance(tool_choice, str) and tool_choice not in ("auto", "none", "required"):
+            tool_choice = {"type": "function", "function": {"name": tool_choice}}
+        if tool_choice is not None:
+            kwargs["tool_choice"] = tool_choice
+        return self.bind(tools=formatted, **kwargs)
+
+    def _retrying(self, run_manager) -> Retrying:
+        def before_sleep(retry_state):
+            if run_manager:
+                run_manager.on_retry(retry_state)
+        return Retrying(
+            stop=stop_after_attempt(self.max_retries + 1),
+            wait=wait_exponential_jitter(initial=1, max=20),
+            retry=retry_if_exception_type(self.retry_on),
+            before_sleep=before_sleep,
+            reraise=True,
+        )
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        key = request_key(self.model_name, messages, stop=stop, **kwargs)
+        entry = self.store.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.store.record(key, entry)
+            return load_hit(entry)
+
+        self.misses += 1
+        for attempt in self._retrying(run_manager):
+            with attempt:
+                result = self.model._generate(messages, stop=stop, **kwargs)
+        entry = dump_result(result)
+        self.store.put(key, entry)
+        self.store.record(key, entry)
+        return result
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        key = request_key(self.model_name, messages, stop=stop, **kwargs)
+        entry = self.store.get(key)
+        if entry is not None:
+            self.hits += 1
+            yield from load_chunks(entry)
+        else:
+            self.misses += 1
+            # retry until the first chunk arrives, after that errors propagate
+            for attempt in self._retrying(run_manager):
+                with attempt:
+                    chunks = self.model._stream(messages, stop=stop, **kwargs)
+                    acc = next(chunks, None)
+            # nothing streamed, nothing to cache
+            if acc is None:
+                return
+            yield acc
+            # pass chunks through as they arrive and cache the whole stream
+            for chunk in chunks:
+                acc = acc + chunk
+                yield chunk
+            entry = dump_chunks(acc)
+            self.store.put(key, entry)
+        self.store.record(key, entry)
+
+
+class ReplayChatModel(CachedChatModel):
+    """
+    Fake chat model answering only from a recorded session, never the network.
+
+    Requests are matched by key first. If the prompt drifted (e.g. the
+    workspace differs from the recording) the next response in recorded
+    order is served instead.
+    """
+
+    model: Optional[BaseChatModel] = None
+    session: list = []
+    recorded: dict = {}
+    position: int = 0
+
+    @classmethod
+    def from_session(cls, model_name: str, session_path: str) -> "ReplayChatModel":
+        with open(session_path, "r", encoding="utf-8") as f:
+            session = [json.loads(line) for line in f if line.strip()]
+        if not session:
+            raise Exception(f"Replay: no recorded requests in {session_path}")
+        recorded = {r["key"]: r["entry"] for r in session}
+        return cls(model_name=model_name, store=None, session=session, recorded=recorded)
+
+    def model_post_init(self, __context: Any):
+        pass
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay-chat-model"
+
+    def _replay(self, messages, stop, **kwargs) -> dict:
+        key = request_key(self.model_name, messages, stop=stop, **kwargs)
+        if key in self.recorded:
+            self.hits += 1
+            entry = self.recorded[key]
+        elif self.position < len(self.session):
+            self.misses += 1
+            entry = self.session[self.position]["entry"]
+        else:
+            raise Exception("Replay: recorded session exhausted.")
+        self.position += 1
+        return entry
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        return load_hit(self._replay(messages, stop, **kwargs))
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        yield from load_chunks(self._replay(messages, stop, **kwargs))
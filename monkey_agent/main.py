@@ -10,49 +10,134 @@ to use:
     run uv run main.py
     * to make faster change model
 
+llm responses are cached under .llm-cache (MONKEY_CACHE_DIR) so repeated
+prompts skip the network, bounded by MONKEY_CACHE_MAX_MB. set
+MONKEY_REPLAY=.llm-cache/sessions/latest.jsonl to re-run the last
+recorded session offline.
+
+each node, llm and tool call is traced to monkey-trace.jsonl (MONKEY_TRACE)
+with a summary table and per task breakdown printed at the end.
+
+set MONKEY_STREAM=1 to start coding each task as soon as the architect
+streams it instead of waiting for the full task list.
+
 example code generation under monkey-generated-code directory.
 """
 
+import contextvars
+import os
+import queue
+import threading
 from dotenv import load_dotenv
 from typing import Annotated, Literal, TypedDict, List
 from prompts import planner_agent_prompt, architect_agent_prompt, coder_agent_prompt
 from schemas import *
 from utils import *
+from cache import LLMCache, CachedChatModel, ReplayChatModel
+from telemetry import Tracer
 from langgraph.graph import StateGraph, END
 from langgraph.prebuilt import create_react_agent
 from langchain_openai import ChatOpenAI
+import openai
+from langchain_core.runnables import RunnableConfig
 
 load_dotenv()
 
-# low temperature for consistent results
-llm = ChatOpenAI(model='gpt-4-nano-2022-04-01', temperature=0.1)
-llm = ChatOpenAI(model='gpt-5-nano-2025-08-07', temperature=0.1)
+MODEL = 'gpt-5-nano-2025-08-07'
+
+def build_llm():
+    """
+    Build cached chat model, or offline replay model if MONKEY_REPLAY is set.
+    """
+    replay_session = os.getenv("MONKEY_REPLAY")
+    if replay_session:
+        return ReplayChatModel.from_session(MODEL, replay_session)
+    cache = LLMCache(
+        os.getenv("MONKEY_CACHE_DIR", ".llm-cache"),
+        max_bytes=int(os.getenv("MONKEY_CACHE_MAX_MB", "256")) * 1024 * 1024,
+    )
+    # low temperature for consistent results
+    # client retries are off so CachedChatModel retries and reports them
+    return CachedChatModel(
+        model=ChatOpenAI(model=MODEL, temperature=0.1, max_retries=0),
+        store=cache,
+        retry_on=(openai.APIConnectionError, openai.APITimeoutError, openai.RateLimitError, openai.InternalServerError),
+    )
+
+llm = build_llm()
+
+# structured output wrappers built once and reused across runs
+planner_llm = llm.with_structured_output(PlanSchema)
+architect_llm = llm.with_structured_output(ArchitectSchema)
+
+# files larger than this are previewed instead of sent whole
+INLINE_LIMIT = 4000
+PREVIEW_LINES = 40
 
-def planner_monkey(state: AgentState) -> AgentState:
+class CoderSession:
+    """
+    Persistent coder shared across code_monkey tasks.
+
+    Compiles the react agent once and builds task prompts from the
+    cached workspace files, inlining only the file the task touches.
+    """
+    def __init__(self, model, tools):
+        self.agent = create_react_agent(model=model, tools=tools)
+        self.system_prompt = coder_agent_prompt()
+
+    def file_context(self, path: str) -> str:
+        content = read_file.run(path)
+        if len(content) <= INLINE_LIMIT:
+            return f"existing_code:\n{content}"
+        # large files: send a preview and let the agent read more if needed
+        lines = content.splitlines()
+        preview = "\n".join(lines[:PREVIEW_LINES])
+        return (
+            f"existing_code ({len(lines)} lines, first {PREVIEW_LINES} shown, "
+            f"use read_file for the rest):\n{preview}"
+        )
+
+    def run(self, task: TaskSchema, task_ind: int, config: RunnableConfig = None):
+        # writes made during this task are attributed to it in the index
+        INDEX.begin_task(task_ind)
+        user_prompt = (
+            f"task: {task.task_description}\n"
+            f"file: {task.path}\n"
+            f"{self.file_context(task.path)}\n"
+            "use write_file(path, content) to modify the file\n"
+            "ensure code is clean, well-commented, and follows best practices"
+        )
+        # pass in general system prompt and user prompt
+        return self.agent.invoke({"messages": [{"role": "system", "content": self.system_prompt}, {"role": "user", "content": user_prompt}]}, config)
+
+monkey_tools = [read_file, read_files, write_file, ls_files, changed_files, get_cwd]
+coder_session = CoderSession(llm, monkey_tools)
+
+def planner_monkey(state: AgentState, config: RunnableConfig = None) -> AgentState:
     """
     Generate comprehensive project plan based on the user prompt.
     """
     user_prompt: str = state["user_prompt"]
     prompt = planner_agent_prompt(user_prompt)
-    response: PlanSchema = llm.with_structured_output(PlanSchema).invoke(prompt)
+    response: PlanSchema = planner_llm.invoke(prompt, config)
     if response is None:
         raise Exception("Planner Agent: Unable to generate plan.")
     
     return {"plan": response}
 
-def architect_monkey(state: AgentState) -> AgentState:
+def architect_monkey(state: AgentState, config: RunnableConfig = None) -> AgentState:
     """
     Break down plan into actionaable tasks with implementation details.
     """
     plan_str = str(state["plan"])
     prompt = architect_agent_prompt(plan_str)
-    response = llm.with_structured_output(ArchitectSchema).invoke(prompt)
+    response = architect_llm.invoke(prompt, config)
     if response is None:
         raise Exception("Architect Agent: Unable to generate tasks.")
     
     return {"architect": response}
 
-def code_monkey(state: AgentState) -> AgentState:
+def code_monkey(state: AgentState, config: RunnableConfig = None) -> AgentState:
     """
     Execute each implementation task one by one.
     """
@@ -60,40 +145,39 @@ def code_monkey(state: AgentState) -> AgentState:
     if coder_state is None:
         coder_state = CoderState(architect=state["architect"], curr_task_ind=0)
     
-    # get current task and existing code from coder_state
+    # get current task from coder_state
     list_of_tasks = coder_state.architect.tasks
     if coder_state.curr_task_ind >= len(list_of_tasks):
         return {"coder_state": coder_state, "status": "DONE"}
 
-    curr_task = list_of_tasks[coder_state.curr_task_ind]    
-    existing_code = read_file.run(curr_task.path)
-    user_prompt = (
-        f"task: {curr_task.task_description}"
-        f"file: {curr_task.path}"
-        f"existing_code: {existing_code}"
-        "use write_file(path, content) to modify the file"
-        "ensure code is clean, well-commented, and follows best practices"
-        
-    )
-    system_prompt = coder_agent_prompt()
-    
-    monkey_tools = [read_file, write_file, ls_files, get_cwd]
-    agent = create_react_agent(model=llm,  tools=monkey_tools)
-    # pass in general system prompt and user prompt
-    agent.invoke({"messages": [{"role": "system", "content": system_prompt}, {"role": "user", "content": user_prompt} ]})
+    curr_task = list_of_tasks[coder_state.curr_task_ind]
+    coder_session.run(curr_task, coder_state.curr_task_ind, config)
     
     # increment curr_task_ind and return status
     coder_state.curr_task_ind += 1
     return {"coder_state": coder_state, "status": "IN_PROGRESS"}
 
-def build_graph():
+def task_label(state: AgentState):
+    """
+    Name the task code_monkey is about to run, None once all are done.
+    """
+    coder_state = state.get("coder_state")
+    ind = coder_state.curr_task_ind if coder_state else 0
+    tasks = state["architect"].tasks
+    if ind >= len(tasks):
+        return None
+    return f"task {ind}: {tasks[ind].path}"
+
+def build_graph(tracer: Tracer = None):
     """
     Build state graph for monkey software engineer agent.
     """
+    # time every node when tracing
+    wrap = tracer.node if tracer else (lambda name, fn, label=None: fn)
     graph = StateGraph(AgentState)
-    graph.add_node("plan_monkey", planner_monkey)
-    graph.add_node("architect_monkey", architect_monkey)
-    graph.add_node("code_monkey", code_monkey)
+    graph.add_node("plan_monkey", wrap("plan_monkey", planner_monkey))
+    graph.add_node("architect_monkey", wrap("architect_monkey", architect_monkey))
+    graph.add_node("code_monkey", wrap("code_monkey", code_monkey, label=task_label))
 
     graph.set_entry_point("plan_monkey")
     graph.add_edge("plan_monkey", "architect_monkey")
@@ -107,11 +191,104 @@ def build_graph():
     )
     return graph.compile()
 
+def stream_tasks(plan: PlanSchema, config: RunnableConfig = None):
+    """
+    Stream architect output and yield each task once it is complete.
+    """
+    prompt = architect_agent_prompt(str(plan))
+    architect_tools = llm.bind_tools([ArchitectSchema], tool_choice="ArchitectSchema")
+    message, emitted = None, 0
+    for chunk in architect_tools.stream(prompt, config):
+        message = chunk if message is None else message + chunk
+        tasks = message.tool_calls[0]["args"].get("tasks", []) if message.tool_calls else []
+        # a task is complete once the architect has started the next one
+        while emitted < len(tasks) - 1:
+            yield TaskSchema(**tasks[emitted])
+            emitted += 1
+    tasks = message.tool_calls[0]["args"].get("tasks", []) if message and message.tool_calls else []
+    if not tasks:
+        raise Exception("Architect Agent: Unable to generate tasks.")
+    for task in tasks[emitted:]:
+        yield TaskSchema(**task)
+
+def stream_build(user_prompt: str, tracer: Tracer = None) -> AgentState:
+    """
+    Early-start pipeline, coding each task while the architect streams the rest.
+
+    Tasks still run one at a time in architect order since later tasks may
+    depend on files written by earlier ones.
+    """
+    wrap = tracer.node if tracer else (lambda name, fn, label=None: fn)
+    config = {"callbacks": [tracer]} if tracer else None
+
+    state = wrap("plan_monkey", planner_monkey)({"user_prompt": user_prompt}, config)
+    plan = state["plan"]
+    print(f"plan: {plan.name}, {len(plan.files)} files")
+
+    # tasks list grows as the architect streams, coder follows behind
+    coder_state = CoderState(architect=ArchitectSchema(tasks=[]), curr_task_ind=0)
+    state = {"user_prompt": user_prompt, "plan": plan, "architect": coder_state.architect, "coder_state": coder_state}
+    ready = queue.Queue()
+    errors = []
+    # set when either side fails so the coder drains the queue without coding
+    stop = threading.Event()
+    print_lock = threading.Lock()
+
+    def progress(msg: str):
+        # keep lines from both threads intact on the console
+        with print_lock:
+            print(msg, flush=True)
+
+    code = wrap("code_monkey", code_monkey, label=task_label)
+
+    def coder():
+        while ready.get() is not None:
+            if stop.is_set():
+                continue
+            task = coder_state.architect.tasks[coder_state.curr_task_ind]
+            progress(f"coding [{coder_state.curr_task_ind}] {task.path}")
+            try:
+                code(state, config)
+            except Exception as e:
+                errors.append(e)
+                stop.set()
+
+    def architect(state, config=None):
+        for task in stream_tasks(state["plan"], config):
+            coder_state.architect.tasks.append(task)
+            progress(f"task [{len(coder_state.architect.tasks) - 1}] {task.path}: {task.task_description[:60]}")
+            ready.put(task)
+        return {"architect": coder_state.architect}
+
+    # copy context so telemetry context variables carry into the coder thread
+    worker = threading.Thread(target=contextvars.copy_context().run, args=(coder,))
+    worker.start()
+    try:
+        wrap("architect_monkey", architect)(state, config)
+    except BaseException:
+        stop.set()
+        raise
+    finally:
+        ready.put(None)
+        worker.join()
+    if errors:
+        raise errors[0]
+
+    state["status"] = "DONE"
+    return state
+
 def main():
+    tracer = Tracer(os.getenv("MONKEY_TRACE", "monkey-trace.jsonl"))
     try:
-        swe_agent = build_graph()
+        swe_agent = build_graph(tracer)
         user_prompt = input("what do you want to build?: ")
-        res = swe_agent.invoke({"user_prompt": user_prompt}, recursion_limit=100)
+        if os.getenv("MONKEY_STREAM"):
+            res = stream_build(user_prompt, tracer)
+        else:
+            res = swe_agent.invoke(
+                {"user_prompt": user_prompt},
+                {"recursion_limit": 100, "callbacks": [tracer]},
+            )
         
         final_status = res["status"]
         if final_status == "DONE":
@@ -122,6 +299,9 @@ def main():
         print("Exiting...")
     except Exception as e:
         print(f"Error: {e}")
+    finally:
+        tracer.close()
+        print(tracer.report())
 
 if __name__ == "__main__":
     main()
@@ -32,6 +32,7 @@ def coder_agent_prompt() -> str:
     You have access to tools to read and write files.
         - Get a list of all available tools.
         - Review all exising files in the project.
+        - Use read_files to read several files at once and changed_files to see what earlier tasks wrote.
         - Implement full content of the task, integrating with other modules.
         - maintain naming consistency.
         - if module imported, ensure it exists and is implemented.
@@ -0,0 +1,225 @@
+"""
+Token and latency telemetry for the monkey agent graph.
+
+Tracer is a langchain callback handler that records every llm and tool
+call, and wraps graph nodes to time them. Records are attributed to the
+current node and coder task through context variables and streamed to a
+JSONL trace. At the end of a run it prints a summary table per node and
+a flame-style breakdown per task.
+"""
+
+import contextvars
+import json
+import threading
+import time
+from collections import defaultdict
+from typing import Any
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+# node and coder task the current call belongs to
+CURRENT_NODE = contextvars.ContextVar("CURRENT_NODE", default=None)
+CURRENT_TASK = contextvars.ContextVar("CURRENT_TASK", default=None)
+
+BAR_WIDTH = 40
+
+
+def usage_of(response) -> tuple[int, int]:
+    """
+    read prompt and completion tokens from an llm result.
+    """
+    prompt = completion = 0
+    for generations in response.generations:
+        for g in generations:
+            usage = getattr(getattr(g, "message", None), "usage_metadata", None)
+            if usage:
+                prompt += usage.get("input_tokens", 0)
+                completion += usage.get("output_tokens", 0)
+    if prompt or completion:
+        return prompt, completion
+    # fall back to provider reported usage
+    token_usage = (response.llm_output or {}).get("token_usage") or {}
+    return token_usage.get("prompt_tokens", 0), token_usage.get("completion_tokens", 0)
+
+
+class Tracer(BaseCallbackHandler):
+    """
+    Collect timing and token records for graph nodes, llm and tool calls.
+    """
+
+    def __init__(self, path: str = "monkey-trace.jsonl"):
+        self.path = path
+        self.records: list[dict] = []
+        self.pending: dict[Any, dict] = {}
+        self.lock = threading.Lock()
+        self.file = open(path, "w", encoding="utf-8")
+
+    def emit(self, record: dict):
+        with self.lock:
+            self.records.append(record)
+            self.file.write(json.dumps(record) + "\n")
+            self.file.flush()
+
+    def begin(self, run_id, kind: str, name: str):
+        self.pending[run_id] = {
+            "kind": kind,
+            "name": name,
+            "node": CURRENT_NODE.get(),
+            "task": CURRENT_TASK.get(),
+            "start": time.time(),
+            "retries": 0,
+        }
+
+    def end(self, run_id, **fields):
+        record = self.pending.pop(run_id, None)
+        if record is None:
+            return
+        record["duration"] = time.time() - record["start"]
+        record.update(fields)
+        self.emit(record)
+
+    def node(self, name: str, fn, label=None):
+        """
+        wrap graph node so its wall time is recorded.
+        label(state) optionally names the task the node is working on.
+        """
+        def traced(state, config=None):
+            token = CURRENT_NODE.set(name)
+            task_token = CURRENT_TASK.set(label(state) if label else None)
+            start = time.time()
+            status = "ok"
+            try:
+                return fn(state, config)
+            except Exception:
+                status = "error"
+                raise
+            finally:
+                self.emit({
+                    "kind": "node",
+                    "name": name,
+                    "node": name,
+                    "task": CURRENT_TASK.get(),
+                    "start": start,
+                    "duration": time.time() - start,
+                    "status": status,
+                })
+                CURRENT_TASK.reset(task_token)
+                CURRENT_NODE.reset(token)
+        return traced
+
+    # langchain callbacks
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self.begin(run_id, "llm", (serialized or {}).get("name") or "llm")
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self.begin(run_id, "llm", (serialized or {}).get("name") or "llm")
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        prompt_tokens, completion_tokens = usage_of(response)
+        # cache hits replay recorded usage, no tokens were spent
+        cached = any((g.generation_info or {}).get("cache_hit") for gens in response.generations for g in gens)
+        self.end(run_id, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens, cached=cached, status="ok")
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self.end(run_id, status="error", error=str(error))
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        self.begin(run_id, "tool", (serialized or {}).get("name") or "tool")
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self.end(run_id, status="ok")
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self.end(run_id, status="error", error=str(error))
+
+    def on_retry(self, retry_state, *, run_id, parent_run_id=None, **kwargs):
+        # CachedChatModel reports retries on its own llm run
+        with self.lock:
+            record = self.pending.get(run_id)
+            if record is not None:
+                record["retries"] += 1
+                return
+        # other runnables wrapped with with_retry get a record of their own
+        self.emit({
+            "kind": "retry",
+            "name": "retry",
+            "node": CURRENT_NODE.get(),
+            "task": CURRENT_TASK.get(),
+            "start": time.time(),
+            "duration": 0.0,
+        })
+
+    # reporting
+
+    def close(self):
+        self.file.close()
+
+    def summary(self) -> str:
+        """
+        table of calls, wall time, tokens and retries per node.
+        tokens only count llm calls that were not served from the cache.
+        """
+        rows = defaultdict(lambda: {"calls": 0, "wall": 0.0, "llm": 0, "cached": 0, "prompt": 0, "completion": 0, "retries": 0})
+        for r in self.records:
+            row = rows[r["node"] or "-"]
+            if r["kind"] == "node":
+                row["calls"] += 1
+                row["wall"] += r["duration"]
+            elif r["kind"] == "llm":
+                row["llm"] += 1
+                row["retries"] += r.get("retries", 0)
+                if r.get("cached"):
+                    row["cached"] += 1
+                else:
+                    row["prompt"] += r.get("prompt_tokens", 0)
+                    row["completion"] += r.get("completion_tokens", 0)
+            elif r["kind"] == "retry":
+                row["retries"] += 1
+
+        lines = [f"{'node':<18}{'calls':>6}{'wall s':>10}{'llm':>6}{'cached':>8}{'prompt':>10}{'compl':>10}{'retry':>7}"]
+        for name, row in sorted(rows.items(), key=lambda item: -item[1]["wall"]):
+            lines.append(
+                f"{name:<18}{row['calls']:>6}{row['wall']:>10.2f}{row['llm']:>6}{row['cached']:>8}"
+                f"{row['prompt']:>10}{row['completion']:>10}{row['retries']:>7}"
+            )
+        return "\n".join(lines)
+
+    def flame(self) -> str:
+        """
+        per task breakdown of wall time into llm steps and tool calls.
+        """
+        tasks = defaultdict(lambda: {"wall": 0.0, "parts": defaultdict(float), "steps": 0, "tokens": 0, "retries": 0})
+        for r in self.records:
+            if r["task"] is None:
+                continue
+            task = tasks[r["task"]]
+            if r["kind"] == "node":
+                task["wall"] += r["duration"]
+            elif r["kind"] == "llm":
+                task["steps"] += 1
+                task["retries"] += r.get("retries", 0)
+                if not r.get("cached"):
+                    task["tokens"] += r.get("prompt_tokens", 0) + r.get("completion_tokens", 0)
+                task["parts"]["llm"] += r["duration"]
+            elif r["kind"] == "tool":
+                task["parts"][r["name"]] += r["duration"]
+            elif r["kind"] == "retry":
+                task["retries"] += 1
+
+        if not tasks:
+            return ""
+        longest = max(t["wall"] for t in tasks.values()) or 1.0
+        lines = []
+        for name, task in tasks.items():
+            bar = "#" * max(1, round(BAR_WIDTH * task["wall"] / longest))
+            lines.append(f"{name}  {task['wall']:.2f}s  {task['steps']} steps  {task['tokens']} tokens  {task['retries']} retries")
+            lines.append(f"  {bar}")
+            for part, seconds in sorted(task["parts"].items(), key=lambda item: -item[1]):
+                bar = "#" * round(BAR_WIDTH * seconds / longest)
+                lines.append(f"    {part:<14}{seconds:>8.2f}s {bar}")
+        return "\n".join(lines)
+
+    def report(self) -> str:
+        flame = self.flame()
+        return self.summary() + ("\n\n" + flame if flame else "")
@@ -1,17 +1,114 @@
 from langchain_core.tools import tool  # define tools for AI agent
+from dataclasses import dataclass
+from typing import Optional, Tuple
+import hashlib
+import os
 import pathlib
-from typing import Tuple
+import subprocess
 
 # define a project directory for all generated files
 ROOT = pathlib.Path.cwd() / "monkey-generated-code"
+ROOT_RESOLVED = ROOT.resolve()
 
 # ensure all read/write of files within defined safe directory
+# resolved on every call so symlinks created later are still caught
 def check_safety(path: str) -> pathlib.Path:
     p = (ROOT / path).resolve()
-    if ROOT.resolve() not in p.parents and ROOT.resolve() != p.parent and ROOT.resolve() != p:
+    if ROOT_RESOLVED not in p.parents and ROOT_RESOLVED != p:
         raise Exception(f"File is not in safe directory: {p}")
     return p
 
+@dataclass
+class FileEntry:
+    size: int
+    mtime: float
+    digest: str
+    content: Optional[str]  # None for files that are not utf-8 text
+    task: int = -1  # index of task that last wrote file, -1 if pre-existing
+
+class WorkspaceIndex:
+    """
+    In-memory index of files under ROOT kept current by write_file.
+
+    Scans the directory once on first use, after that listing and reads
+    are served from memory. Tracks which task last wrote each file so
+    agents can ask what changed since a given task.
+    """
+    def __init__(self):
+        self.files: dict[str, FileEntry] = {}
+        self.scanned = False
+        self.scanned_once = False
+        self.curr_task = -1
+
+    def scan(self):
+        # first scan finds pre-existing files, rescans after run_cmd
+        # attribute new or changed files to the current task
+        owner = self.curr_task if self.scanned_once else -1
+        # keep task ownership for files that did not change since last scan
+        previous = self.files
+        self.files = {}
+        for dirpath, _, filenames in os.walk(ROOT_RESOLVED):
+            for name in filenames:
+                path = pathlib.Path(dirpath) / name
+                try:
+                    with open(path, "rb") as f:
+                        raw = f.read()
+                    stat = path.stat()
+                except OSError:
+                    continue
+                try:
+                    content = raw.decode("utf-8")
+                except UnicodeDecodeError:
+                    content = None
+                key, hashed = self.key(path), hashlib.sha256(raw).hexdigest()
+                old = previous.get(key)
+                task = old.task if old is not None and old.digest == hashed else owner
+                self.files[key] = FileEntry(stat.st_size, stat.st_mtime, hashed, content, task)
+        self.scanned = True
+        self.scanned_once = True
+
+    def ensure(self):
+        if not self.scanned:
+            self.scan()
+
+    def key(self, path: pathlib.Path) -> str:
+        return path.relative_to(ROOT_RESOLVED).as_posix()
+
+    def get(self, path: pathlib.Path) -> Optional[FileEntry]:
+        self.ensure()
+        return self.files.get(self.key(path))
+
+    def update(self, path: pathlib.Path, content: str):
+        self.ensure()
+        stat = path.stat()
+        self.files[self.key(path)] = FileEntry(
+            stat.st_size, stat.st_mtime, digest(content), content, self.curr_task
+        )
+
+    def begin_task(self, task_ind: int):
+        # index pre-existing files before any write is attributed to the task
+        self.ensure()
+        self.curr_task = task_ind
+
+    def listing(self, prefix: str = "") -> list[str]:
+        self.ensure()
+        prefix = prefix.rstrip("/") + "/" if prefix else ""
+        return sorted(k for k in self.files if k.startswith(prefix))
+
+    def changed_since(self, task_ind: int) -> list[str]:
+        self.ensure()
+        return sorted(k for k, e in self.files.items() if e.task >= task_ind)
+
+def digest(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+def file_text(entry: FileEntry) -> str:
+    if entry.content is None:
+        return f"Binary file ({entry.size} bytes), not shown."
+    return entry.content
+
+INDEX = WorkspaceIndex()
+
 @tool
 def write_file(path: str, content: str) -> str:
     """
@@ -21,6 +118,7 @@ def write_file(path: str, content: str) -> str:
     path.parent.mkdir(parents=True, exist_ok=True)
     with open(path, "w", encoding="utf-8") as f:
         f.write(content)
+    INDEX.update(path, content)
     return f"File {path} written."
 
 @tool
@@ -28,11 +126,22 @@ def read_file(path: str) -> str:
     """
     read content from specified file path within project root.
     """
-    path = check_safety(path)
-    if not path.exists():
+    entry = INDEX.get(check_safety(path))
+    if entry is None:
         return "File does not exist."
-    with open(path, "r", encoding="utf-8") as f:
-        return f.read()
+    return file_text(entry)
+
+@tool
+def read_files(paths: list[str]) -> str:
+    """
+    read several files within project root in one call.
+    """
+    sections = []
+    for path in paths:
+        entry = INDEX.get(check_safety(path))
+        content = file_text(entry) if entry is not None else "File does not exist."
+        sections.append(f"=== {path} ===\n{content}")
+    return "\n\n".join(sections)
 
 @tool
 def get_cwd() -> str:
@@ -49,10 +158,18 @@ def ls_files(directory: str = ".") -> str:
     path = check_safety(directory)
     if not path.is_dir():
         return "Not a directory."
-    # get all files in directory recursively
-    files = [str(f.relative_to(ROOT)) for f in path.glob("**/*") if f.is_file()]
+    # get all files in directory recursively from the index
+    files = INDEX.listing("" if path == ROOT_RESOLVED else INDEX.key(path))
     return "\n".join(files) if files else "No files found."
 
+@tool
+def changed_files(since_task: int = 0) -> str:
+    """
+    list files written by the given task index or any later task.
+    """
+    files = INDEX.changed_since(since_task)
+    return "\n".join(files) if files else "No files changed."
+
 @tool
 def run_cmd(cmd: str, cwd: str = None, timeout: int = 25) -> Tuple[int, str, str]:
     """
@@ -62,6 +179,8 @@ def run_cmd(cmd: str, cwd: str = None, timeout: int = 25) -> Tuple[int, str, str
     res = subprocess.run(
         cmd, shell=True, capture_output=True, cwd=str(cwd_dir), timeout=timeout, text=True
     )
+    # commands may touch files behind the index, rescan on next use
+    INDEX.scanned = False
     return res.returncode, res.stdout, res.stderr
 
 @tool
@@ -69,7 +188,7 @@ def list_tools():
     """
     list all available tools.
     """
-    return "write_file, read_file, get_cwd, ls_files, run_cmd"
+    return "write_file, read_file, read_files, get_cwd, ls_files, changed_files, run_cmd"
 
 def init_root():
     ROOT.mkdir(parents=True, exist_ok=True)